@@ -0,0 +1,225 @@
+import os
+import sys
+import time
+import random
+import argparse
+import threading
+
+from fake_telegram import FakeBotAPI, FakeUpdateSource, make_update
+
+# Update mix for each scenario: (kind, weight)
+SCENARIOS = {
+    "edits": [("edit", 1)],
+    "media": [("sticker", 1), ("photo", 1)],
+    "joins": [("join", 1)],
+    "mixed": None,  # fake_telegram.DEFAULT_MIX
+    "broadcast": [],  # A single /broadcast from the owner to --users recipients
+    "tracker": [],  # FloodTracker.record on its own, with --users senders over --chats chats at --rate messages/s
+}
+
+
+def percentile(samples: list, fraction: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def rss_megabytes() -> float:
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # Peak, where /proc is unavailable
+
+
+# Point the bot at the --mongo database; must run before main is imported
+def use_database(uri: str) -> None:
+    if uri == "memory":
+        try:
+            import mongomock
+        except ImportError:
+            sys.exit('The "memory" database needs mongomock (pip install mongomock), or pass --mongo <uri>.')
+        import pymongo
+        pymongo.MongoClient = mongomock.MongoClient
+        os.environ["MONGODB_URI"] = "mongodb://localhost"
+    else:
+        os.environ["MONGODB_URI"] = uri
+
+
+# Time FloodTracker.record alone for --duration seconds, on a simulated clock running at --rate messages/s
+def bench_flood_tracker(args) -> None:
+    os.environ["METRICS_PORT"] = "0"
+    use_database(args.mongo)
+    from main import FloodTracker, FLOOD_LIMIT, FLOOD_WINDOW, FLOOD_MAX_SENDERS
+
+    rng = random.Random(args.seed)
+    chat_ids = [-1001000000000 - index for index in range(args.chats)]
+    senders = [(rng.choice(chat_ids), 1000 + index) for index in range(args.users)]
+    tracker = FloodTracker(FLOOD_LIMIT, FLOOD_WINDOW, FLOOD_MAX_SENDERS)
+
+    records = floods = 0
+    started = time.perf_counter()
+    while time.perf_counter() - started < args.duration:
+        for _ in range(10000):
+            chat_id, user_id = senders[rng.randrange(len(senders))]
+            if tracker.record(chat_id, user_id, records, now=records / args.rate) is not None:
+                floods += 1
+            records += 1
+    elapsed = time.perf_counter() - started
+
+    print(f"Scenario: tracker, {args.users} senders over {args.chats} chats at a simulated {args.rate:g} messages/s")
+    print(f"Recorded {records} messages in {elapsed:.1f}s ({records / elapsed:.0f}/s), "
+          f"{floods} floods, {len(tracker)} senders tracked at the end")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Replay synthetic traffic against the bot using a fake Bot API server.")
+    parser.add_argument("scenario", choices=sorted(SCENARIOS))
+    parser.add_argument("--rate", type=float, default=200, help="Updates per second to feed the bot")
+    parser.add_argument("--duration", type=float, default=10, help="Seconds of traffic to generate")
+    parser.add_argument("--chats", type=int, default=50, help="Number of group chats in the traffic")
+    parser.add_argument("--users", type=int, default=5000, help="Recipients for the broadcast scenario, senders for tracker")
+    parser.add_argument("--media-delay", type=int, default=5, help="Deletion delay in seconds configured for every chat")
+    parser.add_argument("--latency", type=float, default=0.02, help="Seconds the fake Bot API takes per call")
+    parser.add_argument("--retry-after-rate", type=float, default=0, help="Fraction of calls answered with 429 RetryAfter")
+    parser.add_argument("--failure-rate", type=float, default=0, help="Fraction of calls answered with 400 Bad Request")
+    parser.add_argument("--mongo", default="memory", help='MongoDB URI, or "memory" for an in-process mongomock database')
+    parser.add_argument("--workers", type=int, default=32, help="Threads handlers run on")
+    parser.add_argument("--seed", type=int, default=1)
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    if args.scenario == "tracker":
+        bench_flood_tracker(args)
+        return
+
+    api = FakeBotAPI(latency=args.latency, retry_after_rate=args.retry_after_rate,
+                     failure_rate=args.failure_rate, seed=args.seed).start()
+
+    # The bot reads its configuration at import time
+    os.environ["TELEGRAM_API_URL"] = api.url
+    os.environ["METRICS_PORT"] = "0"
+    os.environ["DISPATCHER_WORKERS"] = str(args.workers)
+    os.environ["DELETION_SWEEP_INTERVAL"] = "1"
+    os.environ["WRITE_BUFFER_INTERVAL"] = "1"
+    use_database(args.mongo)
+
+    import logging
+    import main as bot_main
+    from telegram import Update
+    from telegram.ext import Updater, TypeHandler
+
+    logging.getLogger().setLevel(logging.WARNING)
+
+    # Keep every handler latency sample, on top of the bot's own histograms
+    latencies = []
+    timed = bot_main.timed
+
+    def sampled(callback):
+        wrapped = timed(callback)
+
+        def wrapper(update, context):
+            started = time.perf_counter()
+            try:
+                return wrapped(update, context)
+            finally:
+                latencies.append(time.perf_counter() - started)
+        return wrapper
+
+    bot_main.timed = sampled
+
+    processed = [0]
+    fed_at = {}  # update_id -> when it was fed
+    waits = []  # Seconds from feeding an update to its handlers starting
+
+    def count_update(update, context) -> None:
+        processed[0] += 1
+        if update.update_id in fed_at:
+            waits.append(time.monotonic() - fed_at[update.update_id])
+
+    bot_main.ensure_indexes()
+    source = FakeUpdateSource(chats=args.chats, mix=SCENARIOS[args.scenario], seed=args.seed)
+    for chat_id in source.chat_ids:
+        bot_main.set_group_delay(chat_id, args.media_delay)
+
+    updater = Updater(dispatcher=bot_main.make_dispatcher(bot_main.make_bot()), workers=None)
+    updater.dispatcher.add_handler(TypeHandler(Update, count_update), group=-100)  # Its own group, so it hides no handler
+    bot_main.register_handlers(updater.dispatcher)
+    bot_main.start_jobs(updater.job_queue, updater.bot)
+    updater.start_polling(poll_interval=0, timeout=1, allowed_updates=Update.ALL_TYPES)
+
+    samples = []  # (seconds since start, updates processed, RSS MB, threads)
+    started = time.monotonic()
+    running = threading.Event()
+    running.set()
+
+    def sample() -> None:
+        while running.is_set():
+            samples.append((time.monotonic() - started, processed[0], rss_megabytes(), threading.active_count()))
+            time.sleep(1)
+
+    threading.Thread(target=sample, name="bench-sampler", daemon=True).start()
+
+    try:
+        if args.scenario == "broadcast":
+            bot_main.auth_collection.insert_many([{"user_id": 10000 + index, "is_started": True} for index in range(args.users)])
+            command = make_update(next(source.update_ids), bot_main.OWNER_ID, bot_main.OWNER_ID, 1, "text")
+            command["message"]["chat"] = {"id": bot_main.OWNER_ID, "type": "private"}
+            command["message"]["text"] = "/broadcast benchmark"
+            command["message"]["entities"] = [{"type": "bot_command", "offset": 0, "length": 10}]
+            api.push_update(command)
+            while bot_main.broadcast_collection.find_one({"status": "done"}) is None:
+                time.sleep(0.2)
+            fed = 1
+            caught_up = time.monotonic() - started
+        else:
+            fed = 0
+            while time.monotonic() - started < args.duration:
+                update = source.next_update()
+                fed_at[update["update_id"]] = time.monotonic()
+                api.push_update(update)
+                fed += 1
+                delay = started + fed / args.rate - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+            # Let the bot catch up, then give scheduled deletions a sweep
+            while processed[0] < fed and time.monotonic() - started < args.duration * 3:
+                time.sleep(0.1)
+            caught_up = time.monotonic() - started
+            time.sleep(args.media_delay + 2 if args.scenario in ("media", "mixed") else 1)
+
+        elapsed = time.monotonic() - started
+    finally:
+        # Stop the bot's threads even if the run failed, so the process can exit
+        running.clear()
+        updater.stop()
+        bot_main.write_buffer.flush()
+        api.stop()
+
+    print(f"Scenario: {args.scenario}, {fed} updates fed at {args.rate:g}/s over {args.chats} chats")
+    print(f"Processed: {processed[0]} updates in {caught_up:.1f}s ({processed[0] / caught_up:.0f}/s), run took {elapsed:.1f}s")
+    print(f"Update wait: p50 {percentile(waits, 0.5) * 1000:.1f} ms, p99 {percentile(waits, 0.99) * 1000:.1f} ms, "
+          f"max {percentile(waits, 1) * 1000:.1f} ms")
+    print(f"Handler latency: p50 {percentile(latencies, 0.5) * 1000:.1f} ms, "
+          f"p99 {percentile(latencies, 0.99) * 1000:.1f} ms over {len(latencies)} calls")
+    print(f"Bot API calls: {api.api_calls()} ({api.api_calls() / max(fed, 1):.2f} per update), "
+          f"{sum(api.errors.values())} injected errors, {api.deleted} messages deleted")
+    for method, count in sorted(api.calls.items()):
+        print(f"  {method}: {count}")
+    if args.scenario == "broadcast":
+        job = bot_main.broadcast_collection.find_one({"status": "done"})
+        print(f"Broadcast: {job['sent']} delivered, {job['failed']} failed, {(job['sent'] + job['failed']) / caught_up:.0f} recipients/s")
+    print("Over time (s, processed, RSS MB, threads):")
+    for second, count, rss, threads in samples:
+        print(f"  {second:5.1f}  {count:8d}  {rss:7.1f}  {threads:4d}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,237 @@
+import json
+import time
+import random
+import argparse
+import itertools
+from collections import Counter, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Condition, Lock, Thread
+from urllib.request import Request, urlopen
+
+# Synthetic traffic mix: (kind, weight)
+DEFAULT_MIX = [("text", 50), ("edit", 20), ("sticker", 15), ("photo", 10), ("join", 5)]
+
+
+# Build a raw Bot API update of the given kind, shaped like the ones Telegram sends
+def make_update(update_id: int, chat_id: int, user_id: int, message_id: int, kind: str) -> dict:
+    user = {"id": user_id, "is_bot": False, "first_name": f"User{user_id}", "username": f"user{user_id}"}
+    message = {
+        "message_id": message_id,
+        "date": int(time.time()),
+        "chat": {"id": chat_id, "type": "supergroup", "title": f"Chat {chat_id}"},
+        "from": user,
+    }
+
+    if kind == "text":
+        message["text"] = f"message {message_id}"
+    elif kind == "edit":
+        message["text"] = f"edited message {message_id}"
+        message["edit_date"] = int(time.time())
+        return {"update_id": update_id, "edited_message": message}
+    elif kind == "sticker":
+        message["sticker"] = {
+            "file_id": f"sticker{message_id}", "file_unique_id": f"s{message_id}",
+            "width": 512, "height": 512, "is_animated": False, "is_video": False, "type": "regular",
+        }
+    elif kind == "photo":
+        message["photo"] = [{"file_id": f"photo{message_id}", "file_unique_id": f"p{message_id}", "width": 90, "height": 90}]
+    elif kind == "join":
+        message["new_chat_members"] = [user]
+    else:
+        raise ValueError(f"Unknown update kind: {kind}")
+
+    return {"update_id": update_id, "message": message}
+
+
+# Endless stream of synthetic updates spread over a fixed set of group chats
+class FakeUpdateSource:
+    def __init__(self, chats: int = 10, users_per_chat: int = 50, mix: list = None, seed: int = None):
+        self.chat_ids = [-1001000000000 - index for index in range(chats)]
+        self.users_per_chat = users_per_chat
+        self.kinds, self.weights = zip(*(mix or DEFAULT_MIX))
+        self.random = random.Random(seed)
+        self.update_ids = itertools.count(1)
+        self.message_ids = {chat_id: itertools.count(1) for chat_id in self.chat_ids}
+
+    def next_update(self, kind: str = None, chat_id: int = None) -> dict:
+        chat_id = chat_id if chat_id is not None else self.random.choice(self.chat_ids)
+        kind = kind or self.random.choices(self.kinds, self.weights)[0]
+        user_id = 1000 + self.random.randrange(self.users_per_chat)
+        return make_update(next(self.update_ids), chat_id, user_id, next(self.message_ids[chat_id]), kind)
+
+    def updates(self, count: int):
+        for _ in range(count):
+            yield self.next_update()
+
+
+# Post updates to a webhook URL at roughly `rate` updates per second (0 means as fast as possible)
+def post_updates(url: str, updates, rate: float = 0) -> int:
+    sent = 0
+    started = time.monotonic()
+    for update in updates:
+        request = Request(url, data=json.dumps(update).encode(), headers={"Content-Type": "application/json"})
+        urlopen(request).close()
+        sent += 1
+        if rate:
+            delay = started + sent / rate - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+    return sent
+
+
+BOT_USER = {"id": 7000000000, "is_bot": True, "first_name": "Guardian", "username": "surveillantsbot"}
+CHAT_CREATOR = {"id": 1, "is_bot": False, "first_name": "Creator", "username": "creator"}
+
+# Threaded server with a listen backlog deep enough for a full worker pool of keep-alive connections
+class FakeServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256
+
+
+# Methods that never get injected failures, so the bot can always start and poll
+RELIABLE_METHODS = {"getMe", "getUpdates", "deleteWebhook", "setWebhook"}
+
+
+# Stand-in for the Bot API: answers every method the bot uses, serves getUpdates from a
+# queue the caller fills, and can add latency, 429 RetryAfter answers and random failures.
+class FakeBotAPI:
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: float = 0, retry_after_rate: float = 0,
+                 retry_after: int = 1, failure_rate: float = 0, seed: int = None):
+        self.latency = latency
+        self.retry_after_rate = retry_after_rate
+        self.retry_after = retry_after
+        self.failure_rate = failure_rate
+        self.random = random.Random(seed)
+        self.calls = Counter()  # Method -> requests received
+        self.errors = Counter()  # Method -> error answers sent
+        self.deleted = 0  # Messages deleted, counting each one in a deleteMessages call
+        self.message_ids = itertools.count(1000000)
+        self._updates = deque()
+        self._updates_ready = Condition()
+        self._lock = Lock()
+
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # Keep-alive, like the real Bot API
+
+            def do_POST(self) -> None:
+                method = self.path.rsplit("/", 1)[-1]
+                length = int(self.headers.get("Content-Length", 0))
+                data = json.loads(self.rfile.read(length) or b"{}") if length else {}
+                status, body = api.handle(method, data)
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            do_GET = do_POST
+
+            def log_message(self, format: str, *args) -> None:
+                pass
+
+        self.server = FakeServer((host, port), Handler)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/bot"
+
+    def start(self) -> "FakeBotAPI":
+        Thread(target=self.server.serve_forever, name="fake-bot-api", daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    # Queue an update for the bot's next getUpdates call
+    def push_update(self, update: dict) -> None:
+        with self._updates_ready:
+            self._updates.append(update)
+            self._updates_ready.notify_all()
+
+    def pending_updates(self) -> int:
+        return len(self._updates)
+
+    def api_calls(self) -> int:
+        return sum(count for method, count in self.calls.items() if method not in RELIABLE_METHODS)
+
+    def _message(self, chat_id, text: str = None) -> dict:
+        return {
+            "message_id": next(self.message_ids),
+            "date": int(time.time()),
+            "chat": {"id": int(chat_id), "type": "supergroup" if int(chat_id) < 0 else "private"},
+            "from": BOT_USER,
+            "text": text or "",
+        }
+
+    def _get_updates(self, data: dict) -> list:
+        limit = int(data.get("limit") or 100)
+        timeout = float(data.get("timeout") or 0)
+        with self._updates_ready:
+            if not self._updates and timeout:
+                self._updates_ready.wait(timeout)
+            return [self._updates.popleft() for _ in range(min(limit, len(self._updates)))]
+
+    def handle(self, method: str, data: dict) -> tuple:
+        with self._lock:
+            self.calls[method] += 1
+
+        if method not in RELIABLE_METHODS:
+            if self.latency:
+                time.sleep(self.latency)
+            roll = self.random.random()
+            if roll < self.retry_after_rate:
+                with self._lock:
+                    self.errors[method] += 1
+                return 429, {"ok": False, "error_code": 429, "description": f"Too Many Requests: retry after {self.retry_after}",
+                             "parameters": {"retry_after": self.retry_after}}
+            if roll < self.retry_after_rate + self.failure_rate:
+                with self._lock:
+                    self.errors[method] += 1
+                return 400, {"ok": False, "error_code": 400, "description": "Bad Request: message to delete not found"}
+
+        if method == "getMe":
+            result = BOT_USER
+        elif method == "getUpdates":
+            result = self._get_updates(data)
+        elif method in ("sendMessage", "forwardMessage", "editMessageText"):
+            result = self._message(data.get("chat_id", 0), data.get("text"))
+        elif method == "getChatAdministrators":
+            result = [{"status": "creator", "user": CHAT_CREATOR, "is_anonymous": False}]
+        elif method == "getChatMember":
+            user_id = int(data.get("user_id", 0))
+            result = {"status": "member", "user": {"id": user_id, "is_bot": False, "first_name": f"User{user_id}", "username": f"user{user_id}"}}
+        elif method == "deleteMessage":
+            with self._lock:
+                self.deleted += 1
+            result = True
+        elif method == "deleteMessages":
+            message_ids = data.get("message_ids", [])
+            if isinstance(message_ids, str):
+                message_ids = json.loads(message_ids)  # python-telegram-bot sends lists JSON-encoded
+            with self._lock:
+                self.deleted += len(message_ids)
+            result = True
+        else:
+            result = True  # answerCallbackQuery, restrictChatMember, deleteWebhook, ...
+        return 200, {"ok": True, "result": result}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Post synthetic Telegram updates to the bot's webhook.")
+    parser.add_argument("url", help="Webhook URL, e.g. http://127.0.0.1:8443/webhook")
+    parser.add_argument("--count", type=int, default=1000, help="Number of updates to send")
+    parser.add_argument("--chats", type=int, default=10, help="Number of group chats to spread updates over")
+    parser.add_argument("--rate", type=float, default=0, help="Updates per second, 0 for unthrottled")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    source = FakeUpdateSource(chats=args.chats, seed=args.seed)
+    started = time.monotonic()
+    sent = post_updates(args.url, source.updates(args.count), args.rate)
+    elapsed = time.monotonic() - started
+    print(f"Posted {sent} updates in {elapsed:.2f}s ({sent / elapsed:.0f}/s)")
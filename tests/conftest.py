@@ -0,0 +1,51 @@
+import os
+import sys
+
+import pytest
+
+# main connects to MongoDB and reads its configuration at import time, so point it at an
+# in-process mongomock database before any test imports it, like bench.py's "memory" database
+mongomock = pytest.importorskip("mongomock")
+import pymongo
+
+pymongo.MongoClient = mongomock.MongoClient
+os.environ["MONGODB_URI"] = "mongodb://localhost"
+os.environ["METRICS_PORT"] = "0"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main
+
+
+# Fake monotonic clock for the time-based classes
+class Clock:
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr(main.time, "monotonic", clock)
+    return clock
+
+
+@pytest.fixture
+def db(monkeypatch):
+    for name in main.db.list_collection_names():
+        main.db.drop_collection(name)
+    main.ensure_indexes()
+    with main.deletion_lock:
+        main.deletion_heap.clear()
+        main.deletion_keys.clear()
+    main.deletion_loaded_until = 0.0
+    main.pending_deletion_counts.clear()
+    main.pending_deletion_total = 0
+    for cache in ("admin_cache", "chat_auth_cache", "group_delay_cache", "policy_cache"):
+        monkeypatch.setattr(main, cache, main.LRUCache(100))
+    yield main.db
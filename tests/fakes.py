@@ -0,0 +1,24 @@
+from telegram.error import BadRequest
+
+
+# Bot that records deleteMessages calls and fails them with `error` when given;
+# single deletes fail with `single_error`
+class DeletingBot:
+    def __init__(self, error=None, single_error=None):
+        self.error = error
+        self.single_error = single_error or BadRequest("Message to delete not found")
+        self.deleted = []
+
+    def _post(self, endpoint: str, data: dict):
+        assert endpoint == "deleteMessages"
+        if self.error:
+            raise self.error
+        self.deleted.extend((data["chat_id"], message_id) for message_id in data["message_ids"])
+
+    def delete_message(self, chat_id: int, message_id: int):
+        raise self.single_error
+
+
+# Scheduled deletions stored in the database, as (chat_id, message_id) pairs
+def pending(db) -> list:
+    return sorted((doc["chat_id"], doc["message_id"]) for doc in db["pending_deletions"].find())
@@ -0,0 +1,50 @@
+import time
+from types import SimpleNamespace
+
+from telegram.error import BadRequest, RetryAfter
+
+import main
+from fakes import DeletingBot, pending
+
+
+def test_due_deletions_are_batched_per_chat(db):
+    bot = DeletingBot()
+    main.load_deletions(time.time() + 60)
+    for message_id in range(3):
+        main.schedule_deletion(-1, message_id, -1)
+    main.schedule_deletion(-2, 7, -1)
+    main.schedule_deletion(-2, 8, 30)  # Not due yet
+
+    main.process_deletions(SimpleNamespace(bot=bot))
+    assert sorted(bot.deleted) == [(-2, 7), (-1, 0), (-1, 1), (-1, 2)]
+    assert pending(db) == [(-2, 8)]
+
+
+def test_deletions_that_fail_transiently_are_rescheduled(db):
+    main.load_deletions(time.time() + 60)
+    main.schedule_deletion(-1, 1, -1)
+
+    main.process_deletions(SimpleNamespace(bot=DeletingBot(error=RetryAfter(5))))
+    assert pending(db) == [(-1, 1)]
+    assert db["pending_deletions"].find_one()["due"] > time.time() + main.DELETION_RETRY_DELAY - 5
+    assert main.pending_deletion_total == 1
+
+
+def test_deletions_that_fail_permanently_are_dropped(db):
+    main.load_deletions(time.time() + 60)
+    main.schedule_deletion(-1, 1, -1)
+
+    main.process_deletions(SimpleNamespace(bot=DeletingBot(error=BadRequest("Message can't be deleted"))))
+    assert pending(db) == []
+
+
+def test_later_batches_stay_pending_when_single_deletes_fail_transiently(db):
+    main.load_deletions(time.time() + 60)
+    for message_id in range(150):
+        main.schedule_deletion(-1, message_id, -1)
+
+    # The first batch falls back to single deletes, and the first of those is rate limited
+    bot = DeletingBot(error=BadRequest("Message can't be deleted"), single_error=RetryAfter(5))
+    main.process_deletions(SimpleNamespace(bot=bot))
+    assert len(pending(db)) == 150
+    assert main.pending_deletion_total == 150
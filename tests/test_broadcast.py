@@ -0,0 +1,86 @@
+import pytest
+from telegram.error import BadRequest
+
+import main
+
+
+# Bot that records who a broadcast reached, and fails sends to `unreachable` chats
+class BroadcastBot:
+    def __init__(self, unreachable=()):
+        self.unreachable = set(unreachable)
+        self.sent = []
+        self.progress = []
+
+    def send_message(self, chat_id: int, text: str):
+        if chat_id in self.unreachable:
+            raise BadRequest("Chat not found")
+        self.sent.append(chat_id)
+
+    def forward_message(self, chat_id: int, from_chat_id: int, message_id: int):
+        self.send_message(chat_id, None)
+
+    def edit_message_text(self, chat_id: int, message_id: int, text: str):
+        self.progress.append(text)
+
+
+@pytest.fixture
+def recipients(db, monkeypatch):
+    monkeypatch.setattr(main, "BROADCAST_CHUNK", 2)  # Checkpoint every two recipients
+    monkeypatch.setattr(main, "broadcast_bucket", main.TokenBucket(1000))
+    db["groups"].insert_many([{"chat_id": -index} for index in range(1, 4)])
+    db["authorized_users"].insert_many([{"user_id": index, "is_started": True} for index in range(1, 6)])
+    db["authorized_users"].insert_one({"user_id": 99, "is_started": False})
+
+
+def new_broadcast(**progress) -> object:
+    job = {
+        "from_chat_id": None, "message_id": None, "text": "hello", "status": "running",
+        "phase": "groups", "last_id": None, "sent": 0, "failed": 0,
+        "progress_chat_id": main.OWNER_ID, "progress_message_id": 1,
+    }
+    job.update(progress)
+    return main.broadcast_collection.insert_one(job).inserted_id
+
+
+def test_reaches_every_group_and_started_user_once(recipients):
+    bot = BroadcastBot(unreachable={-2})
+    broadcast_id = new_broadcast()
+    main.run_broadcast(bot, broadcast_id)
+
+    assert bot.sent == [-1, -3, 1, 2, 3, 4, 5]
+    job = main.broadcast_collection.find_one({"_id": broadcast_id})
+    assert (job["status"], job["sent"], job["failed"]) == ("done", 7, 1)
+    assert bot.progress[-1] == "Broadcast finished: 7 delivered, 1 failed."
+
+
+def test_checkpoints_after_each_chunk(recipients, monkeypatch):
+    checkpoints = []
+    update_one = main.broadcast_collection.update_one
+
+    def record(filter, update, *args, **kwargs):
+        checkpoints.append(dict(update["$set"]))
+        return update_one(filter, update, *args, **kwargs)
+
+    monkeypatch.setattr(main.broadcast_collection, "update_one", record)
+    main.run_broadcast(BroadcastBot(), new_broadcast())
+
+    assert [(checkpoint["phase"], checkpoint["sent"]) for checkpoint in checkpoints[:-1]] == [
+        ("groups", 2), ("groups", 3), ("users", 5), ("users", 7), ("users", 8),
+    ]
+    assert checkpoints[-1] == {"status": "done"}
+
+
+def test_resumes_after_the_last_checkpoint(recipients, db, monkeypatch):
+    users = list(db["authorized_users"].find({"is_started": True}).sort("_id", 1))
+    broadcast_id = new_broadcast(phase="users", last_id=users[1]["_id"], sent=5)
+    new_broadcast(status="done")
+    resumed = []
+    monkeypatch.setattr(main, "start_broadcast_thread", lambda bot, broadcast_id: resumed.append(broadcast_id))
+    bot = BroadcastBot()
+    main.resume_broadcasts(bot)
+    assert resumed == [broadcast_id]
+
+    main.run_broadcast(bot, broadcast_id)
+    assert bot.sent == [3, 4, 5]
+    job = main.broadcast_collection.find_one({"_id": broadcast_id})
+    assert (job["status"], job["sent"]) == ("done", 8)
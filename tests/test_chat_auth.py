@@ -0,0 +1,18 @@
+import main
+
+
+def test_authorize_and_unauthorize(db):
+    assert main.authorize_user(-1, 7, "Alice")
+    assert not main.authorize_user(-1, None, "alice")  # Same user, by username
+    assert main.get_chat_auth(-1)["user_ids"] == {7}
+
+    assert main.unauthorize_user(-1, 7, None)
+    assert not main.unauthorize_user(-1, 7, None)
+
+
+def test_losing_a_concurrent_authorize_is_not_an_error(db, monkeypatch):
+    assert main.authorize_user(-1, 7, "alice")
+    # The other /auth's find_one ran before this insert and saw nothing
+    monkeypatch.setattr(main.chat_auth_collection, "find_one", lambda *args, **kwargs: None)
+    assert not main.authorize_user(-1, 7, "alice")
+    assert main.chat_auth_collection.count_documents({"chat_id": -1}) == 1
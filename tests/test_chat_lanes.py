@@ -0,0 +1,73 @@
+import random
+import time
+from queue import Queue
+from threading import Event, Lock, Thread
+
+from telegram import Update, User
+from telegram.ext import TypeHandler
+
+import main
+from fake_telegram import BOT_USER, make_update
+
+
+# Dispatcher over a bot that never reaches the network
+def make_dispatcher(handler_threads: int) -> main.ChatLaneDispatcher:
+    bot = main.make_bot()
+    bot._bot = User.de_json(BOT_USER, bot)  # Skip the getMe the dispatcher makes on start
+    return main.ChatLaneDispatcher(bot, Queue(), workers=1, handler_threads=handler_threads)
+
+
+def test_each_chats_updates_are_handled_in_order():
+    dp = make_dispatcher(handler_threads=4)
+    handled = {}
+    lock = Lock()
+    delays = random.Random(1)
+
+    def record(update, context) -> None:
+        time.sleep(delays.random() / 1000)  # Uneven handler times would reorder updates run in parallel
+        with lock:
+            handled.setdefault(update.effective_chat.id, []).append(update.update_id)
+
+    dp.add_handler(TypeHandler(Update, record))
+    Thread(target=dp.start, daemon=True).start()
+
+    chat_ids = [-1001000000000 - index for index in range(10)]
+    for update_id in range(500):
+        chat_id = chat_ids[update_id % len(chat_ids)]
+        dp.update_queue.put(Update.de_json(make_update(update_id, chat_id, 1000, update_id, "text"), dp.bot))
+    while not dp.update_queue.empty():
+        time.sleep(0.01)
+    dp.stop()  # Lets every lane finish what it already holds
+
+    assert sum(len(update_ids) for update_ids in handled.values()) == 500
+    for update_ids in handled.values():
+        assert update_ids == sorted(update_ids)
+
+
+def test_a_blocked_chat_holds_up_only_itself():
+    dp = make_dispatcher(handler_threads=2)
+    blocked, released = -1001000000000, Event()
+    handled = []
+
+    def record(update, context) -> None:
+        if update.effective_chat.id == blocked:
+            released.wait(5)  # E.g. waiting out a RetryAfter
+        handled.append((update.effective_chat.id, update.update_id))
+
+    dp.add_handler(TypeHandler(Update, record))
+    Thread(target=dp.start, daemon=True).start()
+
+    # Chat IDs of the same parity, which shared a lane when chats were hashed onto two
+    updates = [(1, blocked), (2, blocked)] + [(3 + index, blocked - 2 * (index + 1)) for index in range(20)]
+    for update_id, chat_id in updates:
+        dp.update_queue.put(Update.de_json(make_update(update_id, chat_id, 1000, update_id, "text"), dp.bot))
+    deadline = time.monotonic() + 5
+    while len(handled) < 20 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert len(handled) == 20
+    assert all(chat_id != blocked for chat_id, _ in handled)
+
+    released.set()
+    dp.stop()
+    assert handled[-2:] == [(blocked, 1), (blocked, 2)]
+    assert dp.chat_lanes == {}
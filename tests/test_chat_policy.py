@@ -0,0 +1,75 @@
+from types import SimpleNamespace
+
+import pytest
+from telegram import Update, User
+
+import main
+from fake_telegram import make_update
+
+
+# Bot whose chats all have the same administrators; counts getChatAdministrators calls
+class AdminBot:
+    def __init__(self, admin_ids=(5,)):
+        self.admin_ids = admin_ids
+        self.lookups = 0
+
+    def get_chat_administrators(self, chat_id: int) -> list:
+        self.lookups += 1
+        return [SimpleNamespace(user=SimpleNamespace(id=admin_id)) for admin_id in self.admin_ids]
+
+
+@pytest.fixture
+def context(db):
+    return SimpleNamespace(bot=AdminBot())
+
+
+def sender(user_id: int, username: str = None) -> User:
+    return User(user_id, "User", False, username=username)
+
+
+def group_update(bot, user_id: int, chat_type: str = "supergroup") -> Update:
+    data = make_update(1, -100, user_id, 1, "sticker")
+    data["message"]["chat"]["type"] = chat_type
+    return Update.de_json(data, bot)
+
+
+def test_policy_exempts_ids_and_usernames_case_insensitively():
+    policy = main.ChatPolicy(frozenset({1}), frozenset({"trusted"}), delay=60)
+    assert policy.exempts(sender(1))
+    assert policy.exempts(sender(2, "Trusted"))
+    assert not policy.exempts(sender(3, "someone"))
+    assert not policy.exempts(sender(4))
+    assert not policy.exempts(None)
+
+
+def test_policy_is_compiled_from_admins_authorizations_and_settings(context):
+    main.authorize_user(-100, 7, "Alice")
+    main.authorize_user(-100, None, "bob")
+    main.set_group_delay(-100, 120)
+
+    policy = main.get_chat_policy(-100, context.bot)
+    assert policy.exempt_ids >= {main.OWNER_ID, *main.ADMINS, 5, 7}
+    assert policy.exempt_usernames == {"alice", "bob"}
+    assert policy.delay == 120
+    assert main.get_chat_policy(-100, context.bot) is policy
+    assert context.bot.lookups == 1
+
+
+def test_policy_is_recompiled_after_changes(context):
+    policy = main.get_chat_policy(-100, context.bot)
+    main.set_group_delay(-100, 60)
+    assert main.get_chat_policy(-100, context.bot).delay == 60
+    main.authorize_user(-100, 8, None)
+    assert 8 in main.get_chat_policy(-100, context.bot).exempt_ids
+    assert main.get_chat_policy(-100, context.bot) is not policy
+
+
+def test_moderated_sender_lets_only_moderated_group_senders_through(context):
+    main.authorize_user(-100, 7, None)
+
+    # The first check compiles the chat's policy, so even the first update is filtered
+    assert not main.moderated_sender(group_update(context.bot, 7))
+    assert not main.moderated_sender(group_update(context.bot, 5))  # Chat admin
+    assert main.moderated_sender(group_update(context.bot, 9))
+    assert not main.moderated_sender(group_update(context.bot, 9, chat_type="private"))
+    assert context.bot.lookups == 1
@@ -0,0 +1,40 @@
+import time
+from types import SimpleNamespace
+
+import main
+from fakes import DeletingBot, pending
+
+
+def test_only_deletions_within_the_horizon_are_held_in_memory(db):
+    main.load_deletions(time.time() + 60)
+    main.schedule_deletion(-1, 1, 30)
+    main.schedule_deletion(-1, 2, 600)
+
+    assert pending(db) == [(-1, 1), (-1, 2)]
+    assert main.deletion_keys == {(-1, 1)}
+    assert main.pending_deletion_total == 2
+
+    main.load_deletions(time.time() + 900)
+    assert main.deletion_keys == {(-1, 1), (-1, 2)}
+    assert len(main.deletion_heap) == 2
+
+
+def test_loading_twice_does_not_duplicate_entries(db):
+    main.schedule_deletion(-1, 1, 30)
+    main.load_deletions(time.time() + 60)
+    main.load_deletions(time.time() + 120)
+    assert len(main.deletion_heap) == 1
+
+
+def test_cancelled_deletions_are_skipped(db):
+    bot = DeletingBot()
+    main.load_deletions(time.time() + 60)
+    main.schedule_deletion(-1, 1, -1)
+    main.schedule_deletion(-1, 2, -1)
+    main.cancel_deletions(-1, [1])
+
+    assert pending(db) == [(-1, 2)]
+    main.process_deletions(SimpleNamespace(bot=bot))
+    assert bot.deleted == [(-1, 2)]
+    assert pending(db) == []
+    assert main.pending_deletion_total == 0
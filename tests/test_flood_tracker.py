@@ -0,0 +1,40 @@
+from main import FloodTracker
+
+
+def test_trips_at_the_limit_within_the_window():
+    tracker = FloodTracker(limit=3, window=10, max_senders=100)
+    assert tracker.record(-1, 7, 1, now=0) is None
+    assert tracker.record(-1, 7, 2, now=1) is None
+    assert tracker.record(-1, 7, 3, now=2) == [1, 2, 3]
+    # The sender starts over once a burst has been returned
+    assert tracker.record(-1, 7, 4, now=3) is None
+
+
+def test_does_not_trip_when_spread_over_more_than_the_window():
+    tracker = FloodTracker(limit=3, window=10, max_senders=100)
+    for message_id, now in enumerate([0, 6, 11, 17, 23]):
+        assert tracker.record(-1, 7, message_id, now=now) is None
+
+
+def test_keeps_senders_and_chats_apart():
+    tracker = FloodTracker(limit=2, window=10, max_senders=100)
+    assert tracker.record(-1, 7, 1, now=0) is None
+    assert tracker.record(-1, 8, 2, now=0) is None
+    assert tracker.record(-2, 7, 3, now=0) is None
+    assert tracker.record(-1, 7, 4, now=1) == [1, 4]
+
+
+def test_evicts_idle_senders():
+    tracker = FloodTracker(limit=5, window=10, max_senders=100)
+    tracker.record(-1, 7, 1, now=0)
+    tracker.record(-1, 8, 2, now=5)
+    assert len(tracker) == 2
+    tracker.record(-1, 9, 3, now=12)  # Sender 7 has been idle for longer than the window
+    assert len(tracker) == 2
+
+
+def test_bounds_the_number_of_senders():
+    tracker = FloodTracker(limit=5, window=10, max_senders=3)
+    for user_id in range(10):
+        tracker.record(-1, user_id, user_id, now=0)
+    assert len(tracker) == 3
@@ -0,0 +1,102 @@
+import time
+from queue import Queue
+
+import pytest
+from telegram import Update, User
+from telegram.ext import Dispatcher
+from telegram.utils.request import Request
+
+import main
+from fake_telegram import BOT_USER, FakeBotAPI, make_update
+from fakes import pending
+
+CHAT_ID = -1001000000000
+
+
+@pytest.fixture(scope="module")
+def api():
+    api = FakeBotAPI().start()
+    yield api
+    api.stop()
+
+
+# Dispatcher with the bot's handlers, talking to the fake Bot API. Updates are
+# handled synchronously, and errors the handlers raise are collected in `errors`.
+class Bot:
+    def __init__(self, api: FakeBotAPI):
+        self.api = api
+        self.bot = main.GuardianBot(main.TELEGRAM_TOKEN, api.url, request=Request(con_pool_size=2))
+        self.bot._bot = User.de_json(BOT_USER, self.bot)  # Skip getMe
+        self.dp = Dispatcher(self.bot, Queue(), workers=1)
+        self.errors = []
+        self.dp.add_error_handler(lambda update, context: self.errors.append(context.error))
+        main.register_handlers(self.dp)
+        self.update_ids = iter(range(1, 1000000))
+
+    def receive(self, kind: str, user_id: int = 1000, message_id: int = 1) -> None:
+        data = make_update(next(self.update_ids), CHAT_ID, user_id, message_id, kind)
+        self.dp.process_update(Update.de_json(data, self.bot))
+
+    # Receive an edit of an earlier media message
+    def receive_edited(self, kind: str, user_id: int = 1000, message_id: int = 1) -> None:
+        data = make_update(next(self.update_ids), CHAT_ID, user_id, message_id, kind)
+        data["edited_message"] = data.pop("message")
+        data["edited_message"]["edit_date"] = data["edited_message"]["date"]
+        self.dp.process_update(Update.de_json(data, self.bot))
+
+
+@pytest.fixture
+def bot(db, api, monkeypatch):
+    api.calls.clear()
+    api.deleted = 0
+    monkeypatch.setattr(main, "chat_send_buckets", main.LRUCache(100))
+    monkeypatch.setattr(main, "flood_tracker", main.FloodTracker(limit=3, window=10, max_senders=100))
+    main.set_group_delay(CHAT_ID, 60)
+    return Bot(api)
+
+
+def test_edited_media_is_handled_as_an_edit(bot, db):
+    bot.receive("photo", message_id=1)
+    bot.receive_edited("photo", message_id=1)
+    bot.receive_edited("sticker", message_id=1)
+
+    assert bot.errors == []
+    assert bot.api.calls["deleteMessage"] == 2
+    assert main.flood_tracker.record(CHAT_ID, 1000, 2) is None  # Only the original photo was tracked
+
+
+def test_media_from_moderated_senders_is_scheduled_for_deletion(bot, db):
+    bot.receive("sticker", message_id=1)
+    bot.receive("photo", user_id=1, message_id=2)  # The chat's creator
+    main.authorize_user(CHAT_ID, 1001, None)
+    bot.receive("photo", user_id=1001, message_id=3)
+
+    assert bot.errors == []
+    assert pending(db) == [(CHAT_ID, 1)]
+    assert db["pending_deletions"].find_one()["due"] == pytest.approx(time.time() + 60, abs=5)
+    assert bot.api.calls["getChatAdministrators"] == 1
+
+
+def test_edits_are_deleted_and_confirmed(bot, db):
+    edits_caught = main.stats_counters["edits_caught"]
+    bot.receive("edit", message_id=1)
+    bot.receive("edit", user_id=1, message_id=2)  # Admins may edit
+
+    assert bot.errors == []
+    assert bot.api.calls["deleteMessage"] == 1
+    assert bot.api.calls["sendMessage"] == 1
+    assert main.stats_counters["edits_caught"] == edits_caught + 1
+    # The confirmation is deleted after 20 seconds
+    [(chat_id, message_id)] = pending(db)
+    assert chat_id == CHAT_ID and message_id != 1
+
+
+def test_floods_are_deleted_at_once_and_the_sender_restricted(bot, db):
+    for message_id in range(1, 4):
+        bot.receive("sticker", message_id=message_id)
+
+    assert bot.errors == []
+    assert bot.api.calls["deleteMessages"] == 1
+    assert bot.api.deleted == 3
+    assert bot.api.calls["restrictChatMember"] == 1
+    assert pending(db) == []  # The burst's scheduled deletions are cancelled, the last one never scheduled
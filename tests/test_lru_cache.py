@@ -0,0 +1,34 @@
+from main import LRUCache
+
+
+def test_evicts_least_recently_used():
+    cache = LRUCache(2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "b" is now the least recently used
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert len(cache) == 2
+
+
+def test_expires_entries(clock):
+    cache = LRUCache(10, ttl=60)
+    cache.set("a", 1)
+    clock.advance(59)
+    assert cache.get("a") == 1
+    clock.advance(2)
+    assert cache.get("a", "gone") == "gone"
+    assert len(cache) == 0
+
+
+def test_counts_hits_and_misses():
+    cache = LRUCache(10)
+    cache.set("a", 1)
+    cache.get("a")
+    cache.get("b")
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert cache.pop("a") == 1
+    assert cache.pop("a", "none") == "none"
@@ -0,0 +1,92 @@
+import socket
+from urllib.request import urlopen
+
+import pytest
+from telegram.ext import DispatcherHandlerStop
+
+import main
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    registry = []
+    monkeypatch.setattr(main, "metrics_registry", registry)
+    return registry
+
+
+def test_counters_render_one_line_per_label_set(registry):
+    calls = main.Counter("calls_total", "Calls")
+    calls.inc(method="sendMessage")
+    calls.inc(2, method="sendMessage")
+    calls.inc(method='say "hi"\\\n')
+    assert main.render_metrics() == (
+        "# HELP calls_total Calls\n"
+        "# TYPE calls_total counter\n"
+        'calls_total{method="sendMessage"} 3\n'
+        'calls_total{method="say \\"hi\\"\\\\\\n"} 1\n'
+    )
+
+
+def test_histograms_render_cumulative_buckets(registry):
+    latency = main.Histogram("latency_seconds", "Latency", buckets=(0.1, 1))
+    for value in (0.05, 0.5, 0.5, 3):
+        latency.observe(value, handler="start")
+    lines = main.render_metrics().splitlines()
+    assert lines[2:] == [
+        'latency_seconds_bucket{handler="start",le="0.1"} 1',
+        'latency_seconds_bucket{handler="start",le="1"} 3',
+        'latency_seconds_bucket{handler="start",le="+Inf"} 4',
+        'latency_seconds_sum{handler="start"} 4.05',
+        'latency_seconds_count{handler="start"} 4',
+    ]
+
+
+def test_gauges_are_read_when_rendered(registry):
+    depth = [3]
+    main.Gauge("queue_depth", "Depth", lambda: depth[0])
+    depth[0] = 5
+    assert main.render_metrics().splitlines()[-1] == "queue_depth 5"
+
+
+def test_timed_records_latency_and_failures(registry, monkeypatch):
+    monkeypatch.setattr(main, "handler_latency", main.Histogram("handler_seconds", "Latency"))
+    monkeypatch.setattr(main, "handler_errors", main.Counter("handler_errors_total", "Errors"))
+
+    def ok(update, context):
+        return "done"
+
+    def failing(update, context):
+        raise ValueError("boom")
+
+    def stopping(update, context):
+        raise DispatcherHandlerStop()
+
+    assert main.timed(ok)(None, None) == "done"
+    with pytest.raises(ValueError):
+        main.timed(failing)(None, None)
+    with pytest.raises(DispatcherHandlerStop):
+        main.timed(stopping)(None, None)
+
+    metrics = main.render_metrics()
+    assert 'handler_errors_total{handler="failing"} 1' in metrics
+    assert 'handler_errors_total{handler="stopping"}' not in metrics
+    for name in ("ok", "failing", "stopping"):
+        assert f'handler_seconds_count{{handler="{name}"}} 1' in metrics
+
+
+def test_a_busy_metrics_port_does_not_stop_the_bot(caplog):
+    with socket.socket() as taken:
+        taken.bind((main.METRICS_LISTEN, 0))
+        taken.listen()
+        main.start_metrics_server(taken.getsockname()[1])
+    assert "Could not serve metrics" in caplog.text
+
+
+def test_metrics_are_served_over_http():
+    with socket.socket() as probe:
+        probe.bind((main.METRICS_LISTEN, 0))
+        port = probe.getsockname()[1]
+    main.start_metrics_server(port)
+    with urlopen(f"http://{main.METRICS_LISTEN}:{port}/metrics") as response:
+        assert response.headers["Content-Type"] == "text/plain; version=0.0.4"
+        assert b"# TYPE guardian_handler_seconds histogram" in response.read()
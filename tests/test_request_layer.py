@@ -0,0 +1,129 @@
+import pytest
+from telegram.error import BadRequest, NetworkError, RetryAfter, TimedOut
+
+import main
+
+
+@pytest.fixture
+def bot(monkeypatch, clock):
+    # Fresh limits for every test, and sleeps that only move the fake clock
+    monkeypatch.setattr(main, "global_send_bucket", main.TokenBucket(30))
+    monkeypatch.setattr(main, "chat_send_buckets", main.LRUCache(100))
+    monkeypatch.setattr(main, "retry_budget", main.TokenBucket(100, capacity=100))
+    bot = main.make_bot()
+    bot.sleeps = []
+    monkeypatch.setattr(main.time, "sleep", lambda seconds: (bot.sleeps.append(seconds), clock.advance(seconds)))
+    return bot
+
+
+# Make the bot's single requests answer with each of `outcomes` in turn: an exception to raise or a result
+def answer_with(monkeypatch, bot, *outcomes):
+    calls = []
+
+    def post_once(endpoint, data, timeout, api_kwargs):
+        calls.append(endpoint)
+        outcome = outcomes[min(len(calls), len(outcomes)) - 1]
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    monkeypatch.setattr(bot, "_post_once", post_once)
+    return calls
+
+
+def test_retry_after_is_waited_out_and_retried(monkeypatch, bot):
+    calls = answer_with(monkeypatch, bot, RetryAfter(3), True)
+    assert bot._post("deleteMessage", {"chat_id": -1, "message_id": 1}) is True
+    assert len(calls) == 2
+    assert bot.sleeps == [3]
+
+
+def test_network_errors_back_off_until_attempts_run_out(monkeypatch, bot):
+    calls = answer_with(monkeypatch, bot, NetworkError("Connection reset"))
+    with pytest.raises(NetworkError):
+        bot._post("getChatAdministrators", {"chat_id": -1})
+    assert len(calls) == main.BOT_API_MAX_ATTEMPTS
+    assert len(bot.sleeps) == main.BOT_API_MAX_ATTEMPTS - 1
+    assert all(0 <= delay <= main.BOT_API_MAX_BACKOFF for delay in bot.sleeps)
+
+
+def test_bad_requests_are_not_retried(monkeypatch, bot):
+    calls = answer_with(monkeypatch, bot, BadRequest("Message to delete not found"))
+    with pytest.raises(BadRequest):
+        bot._post("deleteMessage", {"chat_id": -1, "message_id": 1})
+    assert len(calls) == 1
+
+
+def test_timed_out_sends_are_not_retried(monkeypatch, bot):
+    calls = answer_with(monkeypatch, bot, TimedOut(), True)
+    with pytest.raises(TimedOut):
+        bot._post("sendMessage", {"chat_id": -1, "text": "hi"})
+    assert len(calls) == 1
+    # Other methods are safe to repeat
+    assert bot._post("getChatMember", {"chat_id": -1, "user_id": 7}) is True
+
+
+def test_retries_stop_when_the_budget_is_spent(monkeypatch, bot):
+    monkeypatch.setattr(main, "retry_budget", main.TokenBucket(1, capacity=1))
+    calls = answer_with(monkeypatch, bot, NetworkError("Connection reset"))
+    with pytest.raises(NetworkError):
+        bot._post("getChatAdministrators", {"chat_id": -1})
+    assert len(calls) == 2
+
+
+def test_long_retry_after_is_not_waited_out(monkeypatch, bot):
+    calls = answer_with(monkeypatch, bot, RetryAfter(main.BOT_API_MAX_RETRY_AFTER + 1), True)
+    with pytest.raises(RetryAfter):
+        bot._post("deleteMessage", {"chat_id": -1, "message_id": 1})
+    assert len(calls) == 1
+
+
+def test_threads_with_no_wait_fail_at_once(monkeypatch, bot):
+    calls = answer_with(monkeypatch, bot, RetryAfter(1), True)
+    main.request_limits.max_wait = 0
+    try:
+        with pytest.raises(RetryAfter):
+            bot._post("deleteMessages", {"chat_id": -1, "message_ids": [1]})
+    finally:
+        del main.request_limits.max_wait
+    assert len(calls) == 1
+    assert bot.sleeps == []
+
+
+def test_sends_wait_for_the_chat_rate_limit(monkeypatch, bot):
+    answer_with(monkeypatch, bot, True)
+    bot._post("sendMessage", {"chat_id": 5, "text": "a"})
+    bot._post("sendMessage", {"chat_id": 5, "text": "b"})
+    assert bot.sleeps == [pytest.approx(1)]  # One message per second in private chats
+
+
+def test_busy_chats_are_throttled_locally(monkeypatch, bot):
+    monkeypatch.setattr(main, "BOT_API_CHAT_WAIT", 0.5)
+    calls = answer_with(monkeypatch, bot, True)
+    bot._post("sendMessage", {"chat_id": 5, "text": "a"})
+    with pytest.raises(main.ChatThrottled) as raised:
+        bot._post("sendMessage", {"chat_id": 5, "text": "b"})
+    assert not isinstance(raised.value, RetryAfter)
+    assert len(calls) == 1
+    # Other chats are unaffected
+    bot._post("sendMessage", {"chat_id": 6, "text": "c"})
+    assert len(calls) == 2
+
+
+def test_handler_sends_do_not_outwait_the_global_rate_limit(monkeypatch, bot):
+    monkeypatch.setattr(main, "global_send_bucket", main.TokenBucket(0.25, capacity=1))
+    calls = answer_with(monkeypatch, bot, True)
+    bot._post("sendMessage", {"chat_id": 5, "text": "a"})
+    main.request_limits.max_wait = 2
+    try:
+        # The next global token is 4s away
+        with pytest.raises(main.ChatThrottled):
+            bot._post("sendMessage", {"chat_id": 6, "text": "b"})
+    finally:
+        del main.request_limits.max_wait
+    assert len(calls) == 1
+    assert bot.sleeps == []
+
+    # Without a max_wait, e.g. in a broadcast, the send waits its turn
+    bot._post("sendMessage", {"chat_id": 6, "text": "b"})
+    assert bot.sleeps == [pytest.approx(4)]
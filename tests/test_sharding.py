@@ -0,0 +1,59 @@
+import math
+
+import main
+from fake_telegram import make_update
+
+
+# Evaluate a shard_query() filter against a chat ID the way MongoDB does: $mod truncates like C
+def matches(query: dict, chat_id: int) -> bool:
+    if not query:
+        return True
+    return any(math.fmod(chat_id, divisor) == remainder
+               for clause in query["$or"] for divisor, remainder in [clause["chat_id"]["$mod"]])
+
+
+def test_a_chats_updates_go_to_the_shard_whose_query_matches_it(monkeypatch):
+    monkeypatch.setattr(main, "SHARD_COUNT", 4)
+    chat_ids = [-1001234567890, -1001234567891, -42, -1, 0, 1, 7, 6663845789]
+    for chat_id in chat_ids:
+        owners = []
+        for index in range(4):
+            monkeypatch.setattr(main, "SHARD_INDEX", index)
+            if matches(main.shard_query(), chat_id):
+                owners.append(index)
+        assert owners == [main.shard_of(chat_id)]
+
+
+def test_unsharded_queries_match_every_chat(monkeypatch):
+    monkeypatch.setattr(main, "SHARD_INDEX", None)
+    assert main.shard_query() == {}
+
+
+def test_update_chat_id_finds_the_chat_of_each_update_kind():
+    message = make_update(1, -100, 7, 1, "text")
+    assert main.update_chat_id(message) == -100
+    assert main.update_chat_id(make_update(2, -100, 7, 1, "edit")) == -100
+    callback = {"update_id": 3, "callback_query": {"id": "1", "from": {"id": 7}, "message": message["message"], "data": "back"}}
+    assert main.update_chat_id(callback) == -100
+    member = {"update_id": 4, "chat_member": {"chat": {"id": -200}, "from": {"id": 7}}}
+    assert main.update_chat_id(member) == -200
+    inline = {"update_id": 5, "inline_query": {"id": "1", "from": {"id": 7}, "query": ""}}
+    assert main.update_chat_id(inline) == 7
+    poll = {"update_id": 6, "poll": {"id": "1", "question": "?", "options": []}}
+    assert main.update_chat_id(poll) == 0
+
+
+def test_shards_split_the_bot_wide_limits(monkeypatch):
+    for name in ("global_send_bucket", "retry_budget", "broadcast_bucket"):
+        monkeypatch.setattr(main, name, getattr(main, name))  # Restored after the test
+
+    main.share_send_limits(3)
+    assert main.global_send_bucket.rate == main.BOT_API_RATE / 3
+    assert main.retry_budget.rate == main.BOT_API_RETRY_RATE / 3
+    assert main.broadcast_bucket.rate == main.BROADCAST_RATE / 3
+
+    # Shares below one token per second still let a call through
+    main.share_send_limits(64)
+    assert main.global_send_bucket.try_acquire()
+    assert main.retry_budget.try_acquire()
+    assert main.broadcast_bucket.try_acquire()
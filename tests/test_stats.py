@@ -0,0 +1,87 @@
+from types import SimpleNamespace
+
+import pytest
+
+import main
+
+
+@pytest.fixture
+def counters(db, monkeypatch):
+    monkeypatch.setattr(main, "stats_counters", {"chats": 0, "users": 0, "messages_deleted": 0, "edits_caught": 0})
+    monkeypatch.setattr(main, "unsaved_counters", {"messages_deleted": 0, "edits_caught": 0})
+    return main.stats_counters
+
+
+# Run /stats as `user_id` in a chat of `chat_type` and return the reply
+def run_stats(user_id: int, chat_id: int, chat_type: str) -> str:
+    replies = []
+    update = SimpleNamespace(
+        effective_user=SimpleNamespace(id=user_id),
+        effective_chat=SimpleNamespace(id=chat_id, type=chat_type),
+        message=SimpleNamespace(reply_text=replies.append),
+    )
+    main.stats(update, None)
+    return replies[0]
+
+
+def test_activity_is_counted_and_saved_once(counters, db):
+    main.count_stat("messages_deleted", 3)
+    main.count_stat("edits_caught")
+    assert counters["messages_deleted"] == 3
+
+    assert main.save_counters()["messages_deleted"] == 3
+    main.count_stat("messages_deleted")
+    saved = main.save_counters()
+    assert (saved["messages_deleted"], saved["edits_caught"]) == (4, 1)
+
+
+def test_reconcile_recounts_from_the_database(counters, db):
+    db["groups"].insert_many([{"chat_id": -1}, {"chat_id": -2}])
+    db["authorized_users"].insert_many([{"user_id": 1, "is_started": True}, {"user_id": 2, "is_started": False}])
+    db["bot_stats"].insert_one({"_id": "counters", "messages_deleted": 10})
+    main.count_stat("chats", 5)  # Drifted, e.g. writes that failed
+    main.count_stat("messages_deleted", 2)
+    main.schedule_deletion(-1, 1, 60)
+    main.schedule_deletion(-1, 2, 60)
+    main.count_pending(-1, 3)  # Drifted
+
+    main.reconcile_stats(None)
+    assert (counters["chats"], counters["users"], counters["messages_deleted"]) == (2, 1, 12)
+    assert main.pending_deletion_counts == {-1: 2}
+    assert main.pending_deletion_total == 2
+
+
+def test_pending_deletions_are_counted_per_chat(counters, db):
+    main.schedule_deletion(-1, 1, 60)
+    main.schedule_deletion(-1, 1, 90)  # Rescheduled, not a new deletion
+    main.schedule_deletion(-2, 1, 60)
+    assert main.pending_deletion_counts == {-1: 1, -2: 1}
+    main.cancel_deletions(-1, [1])
+    assert main.pending_deletion_counts == {-2: 1}
+    assert main.pending_deletion_total == 1
+
+
+def test_stats_reports_the_counters(counters, db):
+    main.count_stat("users", 4)
+    main.count_stat("messages_deleted", 9)
+    main.schedule_deletion(-1, 1, 60)
+    main.schedule_deletion(-2, 1, 60)
+
+    reply = run_stats(main.OWNER_ID, main.OWNER_ID, "private")
+    assert "has 4 users" in reply
+    assert "Messages deleted: 9" in reply
+    assert "Pending deletions: 2 across 2 chats" in reply
+    assert "Pending deletions: 1 in this chat" in run_stats(main.OWNER_ID, -1, "supergroup")
+    assert run_stats(12345, -1, "supergroup") == "You are not authorized to use this command."
+
+
+def test_stats_are_labelled_per_shard(counters, db, monkeypatch):
+    monkeypatch.setattr(main, "SHARD_INDEX", 1)
+    monkeypatch.setattr(main, "SHARD_COUNT", 4)
+    main.count_pending(-1, 2)
+
+    reply = run_stats(main.OWNER_ID, main.OWNER_ID, "private")
+    assert "Pending deletions: 2 across 1 chats on this shard" in reply
+    assert reply.endswith("every 60 minutes.")
+    assert "From shard 2 of 4" in reply
+    assert "Pending deletions: 2 in this chat" in run_stats(main.OWNER_ID, -1, "supergroup")
@@ -0,0 +1,42 @@
+from main import TokenBucket
+
+
+def test_allows_bursts_up_to_capacity(clock):
+    bucket = TokenBucket(1, capacity=3)
+    assert [bucket.try_acquire() for _ in range(4)] == [True, True, True, False]
+    clock.advance(1)
+    assert bucket.try_acquire()
+    assert not bucket.try_acquire()
+
+
+def test_acquire_gives_up_after_timeout(clock):
+    bucket = TokenBucket(20 / 60, capacity=1)
+    assert bucket.acquire(timeout=0)
+    # The next token is 3s away, more than the timeout allows, so it fails without sleeping
+    assert not bucket.acquire(timeout=2)
+
+
+def test_acquire_waits_for_refill(clock, monkeypatch):
+    bucket = TokenBucket(2, capacity=1)
+    bucket.acquire()
+    slept = []
+    monkeypatch.setattr("main.time.sleep", lambda seconds: (slept.append(seconds), clock.advance(seconds)))
+    assert bucket.acquire(timeout=1)
+    assert slept == [0.5]
+
+
+def test_hold_pauses_for_the_given_time(clock):
+    bucket = TokenBucket(10, capacity=10)
+    bucket.hold(3)
+    clock.advance(2.9)
+    assert not bucket.try_acquire()
+    clock.advance(0.2)
+    assert bucket.try_acquire()
+
+
+def test_release_gives_back_an_unused_token(clock):
+    bucket = TokenBucket(1, capacity=2)
+    assert bucket.acquire(timeout=0)
+    bucket.release()
+    bucket.release()  # Never above capacity
+    assert [bucket.try_acquire() for _ in range(3)] == [True, True, False]
@@ -0,0 +1,59 @@
+from pymongo.errors import AutoReconnect
+
+from main import WriteBuffer
+
+
+def test_collapses_upserts_of_the_same_document(db):
+    buffer = WriteBuffer(max_pending=100)
+    users = db["authorized_users"]
+    buffer.upsert(users, {"user_id": 1}, {"$set": {"is_started": True, "name": "a"}})
+    buffer.upsert(users, {"user_id": 1}, {"$set": {"name": "b"}})
+    buffer.upsert(users, {"user_id": 2}, {"$set": {"is_started": True}})
+    assert len(buffer) == 2
+    assert buffer.collapsed == 1
+
+    buffer.flush()
+    assert len(buffer) == 0
+    assert buffer.written == 2
+    assert users.find_one({"user_id": 1}, {"_id": 0}) == {"user_id": 1, "is_started": True, "name": "b"}
+    assert users.count_documents({}) == 2
+
+
+def test_flushes_when_full_and_reports_upserts(db):
+    upserted = []
+    buffer = WriteBuffer(max_pending=2, on_upserted=lambda name, count: upserted.append((name, count)))
+    groups = db["groups"]
+    buffer.upsert(groups, {"chat_id": -1}, {"$set": {"title": "a"}})
+    assert groups.count_documents({}) == 0
+    buffer.upsert(groups, {"chat_id": -2}, {"$set": {"title": "b"}})
+    assert groups.count_documents({}) == 2
+    assert upserted == [("groups", 2)]
+
+
+def test_discard_drops_a_buffered_upsert(db):
+    buffer = WriteBuffer(max_pending=100)
+    groups = db["groups"]
+    buffer.upsert(groups, {"chat_id": -1}, {"$set": {"title": "a"}})
+    buffer.discard(groups, {"chat_id": -1})
+    buffer.flush()
+    assert groups.count_documents({}) == 0
+
+
+def test_keeps_upserts_when_the_write_fails(db, monkeypatch):
+    buffer = WriteBuffer(max_pending=100)
+    users = db["authorized_users"]
+    buffer.upsert(users, {"user_id": 1}, {"$set": {"is_started": True, "name": "a"}})
+
+    def unreachable(*args, **kwargs):
+        raise AutoReconnect("connection refused")
+
+    monkeypatch.setattr(users, "bulk_write", unreachable)
+    buffer.flush()
+    assert len(buffer) == 1
+    assert buffer.written == 0
+
+    # Newer values buffered meanwhile win over the ones that failed
+    buffer.upsert(users, {"user_id": 1}, {"$set": {"name": "b"}})
+    monkeypatch.undo()
+    buffer.flush()
+    assert users.find_one({"user_id": 1}, {"_id": 0}) == {"user_id": 1, "is_started": True, "name": "b"}